@@ -1,125 +1,355 @@
+import atexit
+import bisect
+import functools
+import itertools
 import random
 import time
 from blessed import Terminal
 from datetime import datetime
+from collections import Counter, deque
 import json
+import math
 import os
-import statistics
+import sys
+import threading
+
+try:
+    import orjson  # Optional, much faster JSON encoding/decoding
+except ImportError:
+    orjson = None
 
 
 # File paths
 
-performance_data_file_path = "performance.json"
+performance_data_file_path = "performance.jsonl"  # One JSON entry per line, appended to as attempts are logged
+legacy_performance_data_file_paths = ["performance.msgpack", "performance.json"]  # Whole-list snapshots from older versions
 config_file_path = "config.json"
 
 
-# List to store performance data of the user
-performance_data = []
+# Map operation symbols to names
+_OP_NAME = {'+': 'addition', '-': 'subtraction', '*': 'multiplication', '/': 'division'}
+
+
+# Attempts older than this many seconds no longer count towards the time decay
+DECAY_WINDOW = 24 * 3600
+
+
+# Random number generator used for problems and operation selection
+_rng = random.Random()
+
+
+# Most recent raw attempts of the user; everything older only lives on in the aggregates below and on disk
+PERFORMANCE_HISTORY_LIMIT = 2000
+performance_data = deque(maxlen=PERFORMANCE_HISTORY_LIMIT)
+
+# Running per-operation statistics, kept in sync with performance_data
+op_stats = {}
+
+# Most recent attempts across all operations, for the stats screen's recent trend
+last_attempts = deque(maxlen=10)
+
+# Current and longest runs of correct answers
+current_streak = 0
+longest_streak = 0
+
+# Bumped whenever the running statistics change, so cached results can tell when they are stale
+_history_version = 0
+_weights_cache = None
+_weights_cache_key = None  # (history version, hour) the cached weights were computed for
+
+# Buffered append handle for the performance data file, opened on the first logged attempt
+FLUSH_EVERY = 32  # Flush once this many entries are buffered...
+FLUSH_INTERVAL = 5.0  # ...or this many seconds after the last flush
+_performance_log = None
+_unflushed_entries = 0
+_last_flush = time.monotonic()
+
+# Configuration writes are debounced: a change is written CONFIG_SAVE_DELAY seconds after the first unsaved one
+CONFIG_SAVE_DELAY = 0.5
+_pending_config = None  # Config waiting to be written, if any
+_saved_config = None  # Encoded config last written to disk
+_config_timer = None  # Pending background flush, if any
+_config_lock = threading.Lock()
+
+def _loads_json(data):
+    """
+    Decode JSON bytes, using orjson when it is installed.
+    """
+    return orjson.loads(data) if orjson else json.loads(data)
+
+def _read_json(path):
+    """
+    Read and decode a JSON file, using orjson when it is installed.
+    """
+    with open(path, 'rb') as f:
+        return _loads_json(f.read())
+
+def _dump_json(obj, indent=False):
+    """
+    Encode an object as JSON bytes, using orjson when it is installed.
+    orjson only supports two-space indentation, so indent is a flag rather than a width.
+    """
+    if orjson:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    if indent:
+        return json.dumps(obj, indent=2).encode()
+    return json.dumps(obj, separators=(',', ':')).encode()
 
 def save_performance_data():
     """
-    Save the performance data to a JSON file.
-    If the file does not exist, it creates a new file with an empty list.
+    Flush buffered entries to the performance data file.
+    Entries are only ever appended, the existing history is never rewritten.
     """
-    if not os.path.exists(performance_data_file_path):
-        with open(performance_data_file_path, 'w') as f:
-            json.dump([], f)  # Create an empty list in the file if it doesn't exist
+    global _last_flush, _unflushed_entries
+    _last_flush = time.monotonic()
+    _unflushed_entries = 0
+    if _performance_log is not None:
+        _performance_log.flush()
 
-    with open(performance_data_file_path, 'w') as f:
-        json.dump(performance_data, f, indent=1)
+def _queue_entry(entry):
+    """
+    Append an entry through the buffered log handle, flushing once enough entries or time have built up.
+    """
+    global _performance_log, _unflushed_entries
+    if _performance_log is None:
+        _performance_log = open(performance_data_file_path, 'ab', buffering=1 << 16)
+    _performance_log.write(_dump_json(entry) + b'\n')
+    _unflushed_entries += 1
+    if _unflushed_entries >= FLUSH_EVERY or time.monotonic() - _last_flush >= FLUSH_INTERVAL:
+        save_performance_data()
+
+def _read_performance_log(path):
+    """
+    Read every entry from a JSON Lines performance file.
+    Every complete entry ends in a newline, so anything after the last one is a partial
+    line left by an interrupted append and is cut off before new entries are added.
+    """
+    with open(path, 'rb+') as f:
+        data = f.read()
+        end = data.rfind(b'\n') + 1
+        if end < len(data):
+            f.truncate(end)
+    # Decode the whole log as one JSON array, one C-level call rather than one per line
+    return _loads_json(b'[' + b','.join(line for line in data[:end].splitlines() if line.strip()) + b']')
+
+def _read_legacy_performance_data():
+    """
+    Read a whole-list history saved by an older version.
+    Returns None if there is no legacy file that can be read.
+    """
+    for path in legacy_performance_data_file_paths:
+        if not os.path.exists(path):
+            continue
+        if path.endswith('.msgpack'):
+            try:
+                import msgpack
+            except ImportError:
+                continue  # Cannot read this one, try the next file
+            with open(path, 'rb') as f:
+                return msgpack.unpackb(f.read())
+        return _read_json(path)
+    return None
 
 def load_performance_data():
     """
-    Load the performance data from a JSON file.
-    If the file does not exist, initializes the performance_data as an empty list.
+    Load the performance data from the JSON Lines file.
+    A history saved by an older version is converted the first time, the old file is left in place.
+    Every entry is folded into the running statistics, only the newest PERFORMANCE_HISTORY_LIMIT are kept in memory.
     """
     global performance_data
+    save_performance_data()  # Nothing buffered may be missing from the file being read
     if os.path.exists(performance_data_file_path):
-        with open(performance_data_file_path, 'r') as f:
-            performance_data = json.load(f)
+        entries = _read_performance_log(performance_data_file_path)
+    else:
+        entries = _read_legacy_performance_data() or []  # Start empty if no file exists
+        if entries:
+            tmp_path = performance_data_file_path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(b''.join(_dump_json(entry) + b'\n' for entry in entries))
+            os.replace(tmp_path, performance_data_file_path)
+
+    reset_op_stats()
+    for entry in entries:
+        _record_entry(_annotate_entry(entry), sort_times=False)
+    for stats in op_stats.values():
+        stats['sorted_times'].sort()  # One sort instead of an insort per loaded entry
+
+    performance_data = deque(entries, maxlen=PERFORMANCE_HISTORY_LIMIT)
+
+    # Only attempts inside the decay window are kept for the time-decay sums
+    cutoff = time.time() - DECAY_WINDOW
+    for stats in op_stats.values():
+        _prune_recent_correct(stats, cutoff)
+
+def reset_op_stats():
+    """
+    Reset the running per-operation statistics to empty.
+    """
+    global op_stats, current_streak, longest_streak, _history_version
+    _history_version += 1
+    last_attempts.clear()
+    current_streak = longest_streak = 0
+    op_stats = {
+        op: {'correct': 0, 'incorrect': 0, 'total_time': 0, 'total_time_sq': 0, 'sorted_times': [], 'time_counts': Counter(), 'difficulty_sum': 0,
+             'recent_attempts': deque(maxlen=20), 'window_correct': 0, 'window_time': 0, 'window_time_sq': 0,
+             'recent_correct': deque()}
+        for op in _OP_NAME.values()
+    }
+
+def _annotate_entry(entry):
+    """
+    Fill in fields that entries saved by older versions lack, and normalize the timestamp to epoch seconds.
+    """
+    if 'operation' not in entry:
+        entry['operation'] = _OP_NAME[entry['problem'].split()[1]]
+    entry['timestamp'] = _parse_timestamp(entry['timestamp'])
+    return entry
+
+def _parse_timestamp(timestamp):
+    """
+    Return a timestamp as epoch seconds.
+    Entries saved by older versions store an ISO 8601 string instead of a number.
+    """
+    if isinstance(timestamp, str):
+        return datetime.fromisoformat(timestamp).timestamp()
+    return timestamp
+
+def _record_entry(entry, sort_times=True):
+    """
+    Fold a single entry into the running per-operation statistics, the recent-attempts window and the streaks.
+    Correct entries are also queued for the time-decay term of get_problem_weights.
+    With sort_times=False the time is appended unsorted and the caller must sort afterwards.
+    """
+    global current_streak, longest_streak, _history_version
+    _history_version += 1
+    last_attempts.append(entry)
+    stats = op_stats[entry['operation']]
+    if entry['correct']:
+        stats['correct'] += 1
+        stats['recent_correct'].append(entry)
+        current_streak += 1
+        longest_streak = max(longest_streak, current_streak)
     else:
-        performance_data = []  # Initialize as empty list if file doesn't exist
+        stats['incorrect'] += 1
+        current_streak = 0
+    stats['total_time'] += entry['time_taken']
+    stats['total_time_sq'] += entry['time_taken'] ** 2
+    if sort_times:
+        bisect.insort(stats['sorted_times'], entry['time_taken'])
+    else:
+        stats['sorted_times'].append(entry['time_taken'])
+    stats['time_counts'][round(entry['time_taken'], 1)] += 1  # Bucketed to 0.1s so the mode is meaningful
+    stats['difficulty_sum'] += entry.get('difficulty', 1)  # Default to difficulty level 1 if not specified
+
+    # Running sums over the last-20 window, minus the attempt about to fall out of it
+    window = stats['recent_attempts']
+    if len(window) == window.maxlen:
+        _update_window(stats, window[0], -1)
+    window.append(entry)
+    _update_window(stats, entry, 1)
+
+def _update_window(stats, entry, sign):
+    """
+    Add (sign=1) or remove (sign=-1) an entry from an operation's last-20 window sums.
+    """
+    stats['window_correct'] += sign * entry['correct']
+    stats['window_time'] += sign * entry['time_taken']
+    stats['window_time_sq'] += sign * entry['time_taken'] ** 2
+
+def _prune_recent_correct(stats, cutoff):
+    """
+    Drop entries at or before the cutoff from the front of an operation's time-decay queue.
+    """
+    recent_correct = stats['recent_correct']
+    while recent_correct and recent_correct[0]['timestamp'] <= cutoff:
+        recent_correct.popleft()
 
 def get_problem_weights():
     """
     Calculate weights for each problem type based on past performance and time decay.
     This helps in adjusting the frequency of problem types based on user performance.
+    The result is cached until another attempt is recorded or the hour changes; callers must not modify it.
     """
-    problem_stats = {}
-    current_time = datetime.now()
-
-    for entry in performance_data:
-        problem_type = entry['problem'].split()[1]
-        if problem_type == '+':
-            problem = 'addition'
-        elif problem_type == '-':
-            problem = 'subtraction'
-        elif problem_type == '*':
-            problem = 'multiplication'
-        elif problem_type == '/':
-            problem = 'division'
-
-        difficulty = entry.get('difficulty', 1)  # Default to difficulty level 1 if not specified
-        time_diff = current_time - datetime.fromisoformat(entry['timestamp'])
-        # Adjust decay based on difficulty, more difficult problems have slower decay
-        time_weight = max(0, (24 - time_diff.total_seconds() / 3600) / (18 * difficulty))
-
-        if problem not in problem_stats:
-            problem_stats[problem] = {'correct_weight': 0, 'incorrect_weight': 0, 'total_time': 0, 'attempts': 0, 'times': [], 'difficulty_sum': 0}
-
-        if entry['correct']:
-            problem_stats[problem]['correct_weight'] += time_weight
-        else:
-            problem_stats[problem]['incorrect_weight'] += time_weight
-
-        problem_stats[problem]['total_time'] += entry['time_taken']
-        problem_stats[problem]['attempts'] += 1
-        problem_stats[problem]['times'].append(entry['time_taken'])
-        problem_stats[problem]['difficulty_sum'] += difficulty
+    global _weights_cache, _weights_cache_key
+    cache_key = (_history_version, int(time.time() // 3600))  # Time decay is refreshed at least hourly
+    if _weights_cache_key == cache_key:
+        return _weights_cache
+    if not performance_data:
+        return {}  # Nothing attempted yet, every operation keeps the default weight
+
+    current_time = time.time()
+    cutoff = current_time - DECAY_WINDOW
 
     problem_weights = {}
-    for problem, stats in problem_stats.items():
-        if stats['attempts'] > 0:
-            avg_difficulty = stats['difficulty_sum'] / stats['attempts']
-            accuracy = stats['correct_weight'] / stats['attempts']
+    for problem, stats in op_stats.items():
+        attempts = stats['correct'] + stats['incorrect']
+        if attempts > 0:
+            # Only correct answers from the last 24 hours carry any time weight
+            _prune_recent_correct(stats, cutoff)
+
+            correct_weight = 0
+            for entry in stats['recent_correct']:
+                difficulty = entry.get('difficulty', 1)
+                hours_ago = (current_time - entry['timestamp']) / 3600
+                # Adjust decay based on difficulty, more difficult problems have slower decay
+                correct_weight += max(0, (24 - hours_ago) / (18 * difficulty))
+
+            avg_difficulty = stats['difficulty_sum'] / attempts
+            accuracy = correct_weight / attempts
             # Adjust weight calculation to factor in average difficulty
             weight = (1 / (accuracy + 0.1)) * avg_difficulty
             problem_weights[problem] = max(1, min(weight, 5))  # Cap the weight to a maximum of 5
 
+    _weights_cache, _weights_cache_key = problem_weights, cache_key
     return problem_weights
 
-def generate_problem(operation, difficulty, allow_negative):
+@functools.lru_cache(maxsize=None)
+def max_operand(difficulty):
     """
-    Generate a math problem based on the operation type, difficulty, and whether negative results are allowed.
+    Return the largest operand used for a difficulty level.
+    Difficulty levels are small integers, so results are cached instead of recomputing the power each problem.
     """
     # Adjusted scaling: use a smaller base for exponential growth or a linear growth
     base_val = 5  # Base value for difficulty scaling
     growth_factor = 1.1  # Growth factor for each difficulty level
 
     # Calculate the maximum value based on the new scaling formula
-    adjusted_max_val = int(base_val * (growth_factor ** (difficulty - 1)))
-
-    if operation == 'addition':
-        num1 = random.randint(1, adjusted_max_val)
-        num2 = random.randint(1, adjusted_max_val)
-        answer = num1 + num2
-        problem = f"{num1} + {num2}"
-    elif operation == 'subtraction':
-        num1 = random.randint(1, adjusted_max_val)
-        num2 = random.randint(1, num1) if not allow_negative else random.randint(1, adjusted_max_val)
-        answer = num1 - num2
-        problem = f"{num1} - {num2}"
-    elif operation == 'multiplication':
-        num1 = random.randint(1, adjusted_max_val)
-        num2 = random.randint(1, adjusted_max_val)
-        answer = num1 * num2
-        problem = f"{num1} * {num2}"
-    elif operation == 'division':
-        num2 = random.randint(1, adjusted_max_val)
-        answer = random.randint(1, adjusted_max_val)
-        num1 = num2 * answer
-        problem = f"{num1} / {num2}"
+    return int(base_val * (growth_factor ** (difficulty - 1)))
+
+# Problem generators by operation. Each takes the operand limit and the allow_negative flag and returns
+# (problem, answer); randint is bound as a default argument so it is looked up once, not per call.
+def _addition_problem(max_val, allow_negative, randint=_rng.randint):
+    num1 = randint(1, max_val)
+    num2 = randint(1, max_val)
+    return f"{num1} + {num2}", num1 + num2
+
+def _subtraction_problem(max_val, allow_negative, randint=_rng.randint):
+    num1 = randint(1, max_val)
+    num2 = randint(1, num1) if not allow_negative else randint(1, max_val)
+    return f"{num1} - {num2}", num1 - num2
+
+def _multiplication_problem(max_val, allow_negative, randint=_rng.randint):
+    num1 = randint(1, max_val)
+    num2 = randint(1, max_val)
+    return f"{num1} * {num2}", num1 * num2
+
+def _division_problem(max_val, allow_negative, randint=_rng.randint):
+    num2 = randint(1, max_val)
+    answer = randint(1, max_val)
+    return f"{num2 * answer} / {num2}", answer
+
+_GENERATORS = {
+    'addition': _addition_problem,
+    'subtraction': _subtraction_problem,
+    'multiplication': _multiplication_problem,
+    'division': _division_problem,
+}
 
+def generate_problem(operation, difficulty, allow_negative):
+    """
+    Generate a math problem based on the operation type, difficulty, and whether negative results are allowed.
+    """
+    problem, answer = _GENERATORS[operation](max_operand(difficulty), allow_negative)
     return problem, str(answer)
 
 def log_attempt(problem, correct, time_taken, difficulty):
@@ -130,27 +360,31 @@ def log_attempt(problem, correct, time_taken, difficulty):
     global config
     entry = {
         "problem": problem,
+        "operation": _OP_NAME[problem.split()[1]],
         "correct": correct,
         "time_taken": time_taken,
         "difficulty": difficulty,
-        "timestamp": datetime.now().isoformat()
+        "timestamp": time.time()
     }
-    performance_data.append(entry)
-
-    # Map operation symbols to names
-    operation_map = {'+': 'addition', '-': 'subtraction', '*': 'multiplication', '/': 'division'}
-    operation_symbol = problem.split()[1]
-    operation = operation_map[operation_symbol]
-
-    # Analyze recent performance for this operation
-    recent_attempts = [x for x in performance_data if x['problem'].split()[1] == operation_symbol][-20:]  # Consider last 20 attempts for more data
-    recent_correct = sum(1 for x in recent_attempts if x['correct'])
-    recent_times = [x['time_taken'] for x in recent_attempts]
-
-    if len(recent_times) > 1:
-        mean_time = statistics.mean(recent_times)
-        std_dev_time = statistics.stdev(recent_times)
-        z_score = (time_taken - mean_time) / std_dev_time if std_dev_time > 0 else 0
+    performance_data.append(_annotate_entry(entry))
+    _record_entry(entry)
+    _prune_recent_correct(op_stats[entry['operation']], entry['timestamp'] - DECAY_WINDOW)
+
+    _queue_entry(entry)  # Appended to disk in batches
+
+    operation = entry['operation']
+
+    # Analyze recent performance for this operation, over its last 20 attempts for more data
+    stats = op_stats[operation]
+    recent_count = len(stats['recent_attempts'])
+    recent_correct = stats['window_correct']
+
+    if recent_count > 1:
+        mean_time = stats['window_time'] / recent_count
+        variance = (stats['window_time_sq'] - stats['window_time'] * mean_time) / (recent_count - 1)
+        std_dev_time = math.sqrt(max(0, variance))
+        # Spreads below a microsecond are rounding left in the running sums, not real variation
+        z_score = (time_taken - mean_time) / std_dev_time if std_dev_time > 1e-6 else 0
     else:
         z_score = 0  # Default to no change if insufficient data
 
@@ -159,9 +393,9 @@ def log_attempt(problem, correct, time_taken, difficulty):
     low_performance_z = 0.5    # Worse than 0.5 SD above the mean time
 
     # Adjust difficulty based on performance
-    if recent_correct / len(recent_attempts) > 0.75 and z_score <= high_performance_z:
+    if recent_correct / recent_count > 0.75 and z_score <= high_performance_z:
         config['difficulties'][operation] += 1  # Increase difficulty
-    elif recent_correct / len(recent_attempts) < 0.6 or z_score >= low_performance_z:
+    elif recent_correct / recent_count < 0.6 or z_score >= low_performance_z:
         config['difficulties'][operation] = max(1, config['difficulties'][operation] - 1)  # Decrease difficulty but not below 1
 
     save_config(config)
@@ -176,17 +410,67 @@ def load_config():
         'allow_negative': True
     }
     if os.path.exists(config_file_path):
-        with open(config_file_path, 'r') as f:
-            return json.load(f)
+        return _read_json(config_file_path)
     else:
         return default_config
 
 def save_config(config):
     """
     Save the configuration to a JSON file.
+    The write happens on a background timer CONFIG_SAVE_DELAY seconds later, so bursts of changes share one write.
+    """
+    global _pending_config, _config_timer
+    with _config_lock:
+        _pending_config = config
+        if _config_timer is None:
+            _config_timer = threading.Timer(CONFIG_SAVE_DELAY, flush_config)
+            _config_timer.daemon = True
+            _config_timer.start()
+
+def flush_config():
+    """
+    Write the pending configuration to disk, skipping the write if nothing changed since the last one.
+    """
+    global _pending_config, _saved_config, _config_timer
+    with _config_lock:
+        if _config_timer is not None:
+            _config_timer.cancel()
+            _config_timer = None
+        if _pending_config is None:
+            return
+        data = _dump_json(_pending_config, indent=True)
+        _pending_config = None
+        if data == _saved_config:
+            return
+        tmp_path = config_file_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, config_file_path)
+        _saved_config = data
+
+def menu_line(term, items, index, selected):
     """
-    with open(config_file_path, 'w') as f:
-        json.dump(config, f, indent=4)
+    Return the output that redraws a single menu item in place.
+    Items start on the second row, below the blank line left after clearing the screen.
+    """
+    style = term.reverse if selected else term.normal
+    return term.move_xy(0, index + 1) + style + items[index] + term.normal + term.clear_eol
+
+def draw_menu(term, items, current_selection):
+    """
+    Clear the screen and draw every menu item in a single write.
+    """
+    print(term.clear + "".join(menu_line(term, items, i, i == current_selection) for i in range(len(items))), end="", flush=True)
+
+def move_selection(term, items, current_selection, new_selection):
+    """
+    Move the menu highlight, redrawing only the two lines that change.
+    Returns the new selection, clamped to the menu bounds.
+    """
+    new_selection = max(0, min(len(items) - 1, new_selection))
+    if new_selection != current_selection:
+        print(menu_line(term, items, current_selection, False) + menu_line(term, items, new_selection, True), end="", flush=True)
+    return new_selection
 
 def main_menu(term):
     """
@@ -195,7 +479,6 @@ def main_menu(term):
     """
     global config
     while True:
-        print(term.clear)
         menu_items = [
             'Start Game',
             'Operations',
@@ -205,22 +488,17 @@ def main_menu(term):
             'Quit'
         ]
         current_selection = 0
+        key_up, key_down, key_enter = term.KEY_UP, term.KEY_DOWN, term.KEY_ENTER  # Look up key codes once, not per keystroke
 
         with term.cbreak(), term.hidden_cursor():
+            draw_menu(term, menu_items, current_selection)
             while True:
-                print(term.clear)
-                for i, item in enumerate(menu_items):
-                    if i == current_selection:
-                        print(term.reverse + item)
-                    else:
-                        print(term.normal + item)
-
                 key = term.inkey()
-                if key.code == term.KEY_UP:
-                    current_selection = max(0, current_selection - 1)
-                elif key.code == term.KEY_DOWN:
-                    current_selection = min(len(menu_items) - 1, current_selection + 1)
-                elif key.code == term.KEY_ENTER:
+                if key.code == key_up:
+                    current_selection = move_selection(term, menu_items, current_selection, current_selection - 1)
+                elif key.code == key_down:
+                    current_selection = move_selection(term, menu_items, current_selection, current_selection + 1)
+                elif key.code == key_enter:
                     if menu_items[current_selection] == 'Quit':
                         print(term.normal, term.clear, end="")
                         return
@@ -236,6 +514,9 @@ def main_menu(term):
                         config['allow_negative'] = not config['allow_negative']
                         menu_items[current_selection] = f"Allow Negative Results: {'Enabled' if config['allow_negative'] else 'Disabled'}"
                         save_config(config)
+                        print(menu_line(term, menu_items, current_selection, True), end="", flush=True)
+                        continue
+                    draw_menu(term, menu_items, current_selection)  # A submenu took over the screen
                 elif key.lower() == 'q':
                     print(term.normal, term.clear, end="")
                     return
@@ -247,29 +528,23 @@ def toggle_operations(term):
     """
     global config
     operations = list(config['operations'].keys())
+    items = [f"{op}: {'Enabled' if config['operations'][op] else 'Disabled'}" for op in operations]
     current_selection = 0
+    key_up, key_down, key_enter = term.KEY_UP, term.KEY_DOWN, term.KEY_ENTER  # Look up key codes once, not per keystroke
     with term.cbreak(), term.hidden_cursor():
+        draw_menu(term, items, current_selection)
         while True:
-            print(term.clear)
-            for i, op in enumerate(operations):
-                if config['operations'][op]:
-                    status = "Enabled"
-                else:
-                    status = "Disabled"
-                if i == current_selection:
-                    print(term.reverse + f"{op}: {status}")
-                else:
-                    print(term.normal + f"{op}: {status}")
-
             key = term.inkey()
-            if key.code == term.KEY_UP:
-                current_selection = max(0, current_selection - 1)
-            elif key.code == term.KEY_DOWN:
-                current_selection = min(len(operations) - 1, current_selection + 1)
-            elif key.code == term.KEY_ENTER:
+            if key.code == key_up:
+                current_selection = move_selection(term, items, current_selection, current_selection - 1)
+            elif key.code == key_down:
+                current_selection = move_selection(term, items, current_selection, current_selection + 1)
+            elif key.code == key_enter:
                 op = operations[current_selection]
                 config['operations'][op] = not config['operations'][op]
                 save_config(config)
+                items[current_selection] = f"{op}: {'Enabled' if config['operations'][op] else 'Disabled'}"
+                print(menu_line(term, items, current_selection, True), end="", flush=True)
             elif key.lower() == 'q':
                 return
 
@@ -280,29 +555,30 @@ def adjust_difficulties(term):
     """
     global config
     operations = list(config['difficulties'].keys())
+    items = [f"{op}: {config['difficulties'][op]}" for op in operations]
     current_selection = 0
+    key_up, key_down, key_left, key_right = term.KEY_UP, term.KEY_DOWN, term.KEY_LEFT, term.KEY_RIGHT  # Look up key codes once, not per keystroke
     with term.cbreak(), term.hidden_cursor():
+        draw_menu(term, items, current_selection)
         while True:
-            print(term.clear)
-            for i, op in enumerate(operations):
-                difficulty = config['difficulties'][op]
-                if i == current_selection:
-                    print(term.reverse + f"{op}: {difficulty}")
-                else:
-                    print(term.normal + f"{op}: {difficulty}")
-
             key = term.inkey()
-            if key.code == term.KEY_UP:
-                current_selection = max(0, current_selection - 1)
-            elif key.code == term.KEY_DOWN:
-                current_selection = min(len(operations) - 1, current_selection + 1)
-            elif key.code == term.KEY_LEFT:
-                if config['difficulties'][operations[current_selection]] > 1:
-                    config['difficulties'][operations[current_selection]] -= 1
+            if key.code == key_up:
+                current_selection = move_selection(term, items, current_selection, current_selection - 1)
+            elif key.code == key_down:
+                current_selection = move_selection(term, items, current_selection, current_selection + 1)
+            elif key.code == key_left:
+                op = operations[current_selection]
+                if config['difficulties'][op] > 1:
+                    config['difficulties'][op] -= 1
                     save_config(config)
-            elif key.code == term.KEY_RIGHT:
-                config['difficulties'][operations[current_selection]] += 1
+                    items[current_selection] = f"{op}: {config['difficulties'][op]}"
+                    print(menu_line(term, items, current_selection, True), end="", flush=True)
+            elif key.code == key_right:
+                op = operations[current_selection]
+                config['difficulties'][op] += 1
                 save_config(config)
+                items[current_selection] = f"{op}: {config['difficulties'][op]}"
+                print(menu_line(term, items, current_selection, True), end="", flush=True)
             elif key.lower() == 'q':
                 return
             
@@ -315,53 +591,31 @@ def display_stats(term):
         print(term.clear + "No data available.")
         return
 
-    operation_counts = {op: {'correct': 0, 'incorrect': 0, 'total_time': 0, 'times': []} for op in ['addition', 'subtraction', 'multiplication', 'division']}
-    correct_streaks = []
-    current_streak = 0
-    last_problems = performance_data[-10:]  # Last 10 problems for recent trend
-
-    for entry in performance_data:
-        op = entry['problem'].split()[1]
-        if op == '+':
-            op = 'addition'
-        elif op == '-':
-            op = 'subtraction'
-        elif op == '*':
-            op = 'multiplication'
-        elif op == '/':
-            op = 'division'
-
-        if entry['correct']:
-            operation_counts[op]['correct'] += 1
-            current_streak += 1
-        else:
-            operation_counts[op]['incorrect'] += 1
-            correct_streaks.append(current_streak)
-            current_streak = 0
-        operation_counts[op]['total_time'] += entry['time_taken']
-        operation_counts[op]['times'].append(entry['time_taken'])
-
-    correct_streaks.append(current_streak)  # Add the last streak
-    longest_streak = max(correct_streaks)
-
-    print(term.clear)
-    for op, stats in operation_counts.items():
+    last_problems = last_attempts  # Last 10 problems for recent trend
+
+    lines = [term.clear]  # Collected and written in one go
+    for op, stats in op_stats.items():
         total_attempts = stats['correct'] + stats['incorrect']
         if total_attempts == 0:
             continue
         accuracy = (stats['correct'] / total_attempts) * 100
         avg_time = stats['total_time'] / total_attempts
-        median_time = statistics.median(stats['times']) if stats['times'] else 0
-        mode_time = statistics.mode(stats['times']) if stats['times'] else 0
-        std_dev_time = statistics.stdev(stats['times']) if len(stats['times']) > 1 else 0
-        print(f"{op.title()} - Accuracy: {accuracy:.2f}%, Average Time: {avg_time:.2f}s, Median Time: {median_time:.2f}s, Mode Time: {mode_time:.2f}s, Std Dev Time: {std_dev_time:.2f}s")
-
-    print(f"\nLongest Correct Streak: {longest_streak}")
+        sorted_times = stats['sorted_times']
+        mid = len(sorted_times) // 2
+        median_time = sorted_times[mid] if len(sorted_times) % 2 else (sorted_times[mid - 1] + sorted_times[mid]) / 2
+        mode_time = stats['time_counts'].most_common(1)[0][0] if stats['time_counts'] else 0
+        # Sample standard deviation from the running sums
+        variance = (stats['total_time_sq'] - stats['total_time'] ** 2 / total_attempts) / (total_attempts - 1) if total_attempts > 1 else 0
+        std_dev_time = math.sqrt(max(0, variance))
+        lines.append(f"{op.title()} - Accuracy: {accuracy:.2f}%, Average Time: {avg_time:.2f}s, Median Time: {median_time:.2f}s, Mode Time: {mode_time:.2f}s, Std Dev Time: {std_dev_time:.2f}s")
+
+    lines.append(f"\nLongest Correct Streak: {longest_streak}")
     recent_accuracy = sum(1 for x in last_problems if x['correct']) / len(last_problems) * 100 if last_problems else 0
     recent_avg_time = sum(x['time_taken'] for x in last_problems) / len(last_problems) if last_problems else 0
-    print(f"Recent Performance (Last 10): Accuracy: {recent_accuracy:.2f}%, Average Time: {recent_avg_time:.2f}s")
+    lines.append(f"Recent Performance (Last 10): Accuracy: {recent_accuracy:.2f}%, Average Time: {recent_avg_time:.2f}s")
 
-    print("\nPress any key to return.")
+    lines.append("\nPress any key to return.")
+    print("\n".join(lines), flush=True)
     term.inkey()
 
 def main_game(term):
@@ -372,19 +626,37 @@ def main_game(term):
     global config
     operations = config['operations']
     allow_negative = config['allow_negative']
+    operation_names = [op for op, enabled in operations.items() if enabled]
+    if not operation_names:
+        print(term.clear + "No operations enabled.")
+        term.inkey()
+        return
+    cum_weights = None
+    weights_used = None  # The get_problem_weights result cum_weights was built from
+    # Resolve terminal capabilities once instead of on every problem and keystroke
+    green, red, bright_green, normal = term.green, term.red, term.bright_green, term.normal
+    prompt_prefix = term.clear + bright_green + term.move_yx(0, 0) + "Solve: " + normal
 
     try:
         exit_game = False
         with term.cbreak(), term.hidden_cursor():
             while True:
                 difficulties = config['difficulties']
-                problem_weights = get_problem_weights()
-                operation = random.choices(list(operations.keys()), weights=[problem_weights.get(op, 1) for op in operations], k=1)[0]
+                if len(operation_names) == 1:
+                    operation = operation_names[0]  # Nothing to choose between, so the weights are not needed
+                else:
+                    # get_problem_weights returns the same cached dict until an attempt is logged
+                    problem_weights = get_problem_weights()
+                    if problem_weights is not weights_used:
+                        cum_weights = list(itertools.accumulate(problem_weights.get(op, 1) for op in operation_names))
+                        weights_used = problem_weights
+                    # Weighted pick by binary search over the cumulative weights
+                    operation = operation_names[bisect.bisect(cum_weights, _rng.random() * cum_weights[-1], 0, len(operation_names) - 1)]
                 problem, correct_answer = generate_problem(operation, difficulties[operation], allow_negative)
-                print(term.clear + term.bright_green + term.move_yx(0, 0) + f"Solve: {term.normal}{problem} = ", end="", flush=True)
+                print(prompt_prefix + problem + " = ", end="", flush=True)
 
                 user_answer = ""
-                start_time = time.time()
+                start_time = time.perf_counter()
                 for char in correct_answer:
                     if exit_game:
                         continue
@@ -395,18 +667,21 @@ def main_game(term):
                         return  # Exit the loop to save data
                     if inp == char:
                         user_answer += inp
-                        print(term.green + inp, end="", flush=True)
+                        sys.stdout.write(green + inp)
+                        if len(user_answer) < len(correct_answer):
+                            sys.stdout.flush()  # The last digit is flushed together with the next prompt
                     else:
-                        print(f"{term.red}{inp}\n       {term.bright_green}{problem} {term.normal}= {term.bright_green}{correct_answer}{term.normal}", flush=True)
-                        log_attempt(problem, False, time.time() - start_time, difficulties[operation])
-                        # Ignore any input during the cooldown period
-                        start_cooldown = time.time()
-                        while time.time() - start_cooldown < 1.5:
-                            term.inkey(timeout=1.5 - (time.time() - start_cooldown))
+                        sys.stdout.write(f"{red}{inp}\n       {bright_green}{problem} {normal}= {bright_green}{correct_answer}{normal}\n")
+                        sys.stdout.flush()
+                        log_attempt(problem, False, time.perf_counter() - start_time, difficulties[operation])
+                        # Ignore any input during the cooldown period: wait it out, then discard whatever was typed
+                        time.sleep(1.5)
+                        while term.inkey(timeout=0):
+                            pass
                         break
                 else:
                     if len(user_answer) == len(correct_answer):
-                        log_attempt(problem, True, time.time() - start_time, difficulties[operation])
+                        log_attempt(problem, True, time.perf_counter() - start_time, difficulties[operation])
     finally:
         save_performance_data()  # Save data when exiting the game loop
 
@@ -417,8 +692,10 @@ def main():
     """
     term = Terminal()
     load_performance_data()  # Load data once at startup
+    atexit.register(save_performance_data)  # Flush any attempts that are not saved yet
     global config
     config = load_config()
+    atexit.register(flush_config)  # Write any held-back configuration change
     main_menu(term)
 
 if __name__ == "__main__":